@@ -4,6 +4,8 @@ from __future__ import absolute_import, print_function, unicode_literals
 from _Framework.ControlSurface import ControlSurface
 import socket
 import json
+import math
+import random
 import threading
 import time
 import traceback
@@ -35,6 +37,10 @@ class AbletonMCP(ControlSurface):
         self.udp_server_socket = None
         self.udp_server_thread = None
 
+        # Active server-side modulations, keyed by (track, device, parameter).
+        # Replacing an entry supersedes the running modulation for that key.
+        self._modulations = {}
+
         self.start_tcp_server()
         self.start_udp_server() 
         
@@ -44,6 +50,7 @@ class AbletonMCP(ControlSurface):
     def disconnect(self):
         self.log_message("AbletonMCP: Disconnecting...")
         self.running = False
+        self._modulations.clear()
         
         if self.tcp_server_socket:
             try: self.tcp_server_socket.close()
@@ -174,15 +181,32 @@ class AbletonMCP(ControlSurface):
             while self.running:
                 try:
                     data, addr = self.udp_server_socket.recvfrom(1024)
-                    self.log_message("!!!!!!!! UDP: PACKET RECEIVED from " + str(addr) + " Data: " + str(data[:120])) # DEBUGGING LINE
-                    if not self.running: break 
-                    
+                    if not self.running: break
+
+                    commands = []
                     try:
-                        command_str = data.decode('utf-8')
-                        command_json = json.loads(command_str)
-                        self._process_udp_command(command_json) 
+                        commands.append(json.loads(data.decode('utf-8')))
                     except Exception as e:
                         self.log_message(f"UDP: Error processing datagram: {e}. Data: {str(data[:100])}")
+
+                    # Drain whatever else is already queued so a burst of
+                    # updates becomes one scheduled task instead of one
+                    # main-thread round-trip per packet
+                    self.udp_server_socket.setblocking(False)
+                    try:
+                        while True:
+                            more, _ = self.udp_server_socket.recvfrom(1024)
+                            try:
+                                commands.append(json.loads(more.decode('utf-8')))
+                            except Exception as e:
+                                self.log_message(f"UDP: Error processing datagram: {e}. Data: {str(more[:100])}")
+                    except socket.error:
+                        pass  # No more queued datagrams
+                    finally:
+                        self.udp_server_socket.setblocking(True)
+
+                    if commands:
+                        self._process_udp_commands(commands)
                 except socket.error as se: 
                     if self.running: self.log_message(f"UDP server socket error: {se}")
                     break 
@@ -193,28 +217,38 @@ class AbletonMCP(ControlSurface):
         except Exception as e:
             self.log_message(f"UDP server thread critical error: {e}\n{traceback.format_exc()}")
 
-    def _process_udp_command(self, command):
-        self.log_message("--- UDP: _process_udp_command called with: " + str(command.get("type", "UNKNOWN_TYPE"))) # DEBUGGING LINE
-        command_type = command.get("type", "")
-        params = command.get("params", {})
+    def _process_udp_commands(self, commands):
+        # Coalesce a burst of parameter updates into one main-thread task;
+        # the newest value per (track, device, parameter) wins
+        updates = {}
+        for command in commands:
+            command_type = command.get("type", "")
+            params = command.get("params", {})
+            if command_type == "set_device_parameter":
+                key = (params.get("track_index", 0), params.get("device_index", 0),
+                       params.get("parameter_index", 0))
+                updates[key] = params.get("value", 0.0)
+            elif command_type == "batch_set_device_parameters":
+                t_idx = params.get("track_index", 0)
+                d_idx = params.get("device_index", 0)
+                for p_idx, value in zip(params.get("parameter_indices", []),
+                                        params.get("values", [])):
+                    updates[(t_idx, d_idx, p_idx)] = value
+            else:
+                self.log_message(f"UDP: Received unknown or unsupported command type: {command_type}")
+        if not updates:
+            return
         def task():
             try:
-                if command_type == "set_device_parameter":
-                    self.log_message(f"UDP: MainThread processing set_device_parameter with params: {str(params)}") # DEBUGGING
-                    self._set_device_parameter(params.get("track_index", 0), 
-                                               params.get("device_index", 0), 
-                                               params.get("parameter_index", 0), 
-                                               params.get("value", 0.0))
-                elif command_type == "batch_set_device_parameters":
-                    self.log_message(f"UDP: MainThread processing batch_set_device_parameters with params: {str(params)}") # DEBUGGING
-                    self._batch_set_device_parameters(params.get("track_index", 0), 
-                                                      params.get("device_index", 0), 
-                                                      params.get("parameter_indices", []), 
-                                                      params.get("values", []))
-                else:
-                    self.log_message(f"UDP: Received unknown or unsupported command type on main thread: {command_type}")
+                grouped = {}
+                for (t_idx, d_idx, p_idx), value in updates.items():
+                    indices, values = grouped.setdefault((t_idx, d_idx), ([], []))
+                    indices.append(p_idx)
+                    values.append(value)
+                for (t_idx, d_idx), (indices, values) in grouped.items():
+                    self._batch_set_device_parameters(t_idx, d_idx, indices, values)
             except Exception as e_task:
-                self.log_message(f"UDP: Error executing command '{command_type}' on main thread: {e_task}\n{traceback.format_exc()}")
+                self.log_message(f"UDP: Error applying coalesced updates on main thread: {e_task}\n{traceback.format_exc()}")
         self.schedule_message(0, task)
 
     def _process_command(self, command): # For TCP
@@ -242,7 +276,8 @@ class AbletonMCP(ControlSurface):
                 "set_clip_loop_parameters", "set_clip_follow_action", "quantize_notes_in_clip",
                 "randomize_note_timing", "set_note_probability", "import_audio_file",
                 "set_track_level", "set_track_pan",
-                "set_device_parameter", "batch_set_device_parameters" # TCP fallbacks
+                "set_device_parameter", "batch_set_device_parameters", # TCP fallbacks
+                "modulate_parameter"
                 ]:
                 response_q = queue.Queue()
                 def task_wrapper():
@@ -285,6 +320,7 @@ class AbletonMCP(ControlSurface):
                         elif command_type == "import_audio_file": task_result = self._import_audio_file(params.get("uri",""),params.get("track_index",-1),params.get("clip_index",0),params.get("create_track_if_needed",True))
                         elif command_type == "set_track_level": task_result = self._set_track_level(params.get("track_index",0),params.get("level",0.8))
                         elif command_type == "set_track_pan": task_result = self._set_track_pan(params.get("track_index",0),params.get("pan",0.0))
+                        elif command_type == "modulate_parameter": task_result = self._modulate_parameter(params.get("track_index",0),params.get("device_index",0),params.get("parameter_index",0),params.get("function","sine"),params.get("frequency",1.0),params.get("amplitude",0.5),params.get("duration",5.0))
                         else: # Should not happen if command_type is in the list
                             response_q.put({"status": "error", "message": f"Unmapped state-modifying command: {command_type}"})
                             return
@@ -374,6 +410,52 @@ class AbletonMCP(ControlSurface):
             self.log_message(f"Error in _batch_set_device_parameters: {e}\n{traceback.format_exc()}")
             return {"error": str(e)}
             
+    def _modulate_parameter(self, track_index, device_index, parameter_index,
+                            function="sine", frequency=1.0, amplitude=0.5, duration=5.0):
+        # Run the modulation server-side on Live's timer instead of having the
+        # client stream one datagram per tick: a deterministic sweep is one
+        # command rather than rate*duration packets
+        try:
+            if function not in ("sine", "walk"):
+                return {"error": f"Unknown modulation function: {function}"}
+            if not (0 <= track_index < len(self._song.tracks)): return {"error": "Track index out of range"}
+            track = self._song.tracks[track_index]
+            if not (0 <= device_index < len(track.devices)): return {"error": "Device index out of range"}
+            if not (0 <= parameter_index < len(track.devices[device_index].parameters)):
+                return {"error": f"Param index {parameter_index} out of range"}
+
+            key = (track_index, device_index, parameter_index)
+            if duration <= 0:
+                self._modulations.pop(key, None)
+                return {"modulating": False}
+
+            state = {"function": function, "frequency": frequency, "amplitude": amplitude,
+                     "duration": duration, "start": time.time(), "value": 0.5}
+            self._modulations[key] = state  # latest request wins
+
+            def tick():
+                if self._modulations.get(key) is not state:
+                    return  # superseded or cancelled
+                elapsed = time.time() - state["start"]
+                if elapsed >= state["duration"]:
+                    self._modulations.pop(key, None)
+                    return
+                if state["function"] == "sine":
+                    value = 0.5 + state["amplitude"] * math.sin(2.0 * math.pi * state["frequency"] * elapsed)
+                else:  # walk
+                    value = state["value"] + random.uniform(-state["amplitude"], state["amplitude"]) * 0.1
+                value = max(0.0, min(1.0, value))
+                state["value"] = value
+                self._set_device_parameter(track_index, device_index, parameter_index, value)
+                self.schedule_message(1, tick)  # re-arm on the next ~100ms timer tick
+
+            self.schedule_message(1, tick)
+            return {"modulating": True, "function": function, "frequency": frequency,
+                    "amplitude": amplitude, "duration": duration}
+        except Exception as e:
+            self.log_message(f"Error in _modulate_parameter: {e}\n{traceback.format_exc()}")
+            return {"error": str(e)}
+
     # Placeholder for other command implementations that should be present
     def _create_midi_track(self, index): self.log_message("_create_midi_track called"); return {"status": "ok_placeholder"}
     def _set_track_name(self, track_index, name): self.log_message("_set_track_name called"); return {"status": "ok_placeholder"}
@@ -7,6 +7,34 @@ from dataclasses import dataclass
 from contextlib import asynccontextmanager
 from typing import AsyncIterator, Dict, Any, List, Union
 
+# orjson serializes straight to bytes and parses bytes directly, skipping the
+# str<->utf-8 round-trips on every command; fall back to stdlib json
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    def _loads(data: bytes):
+        return orjson.loads(data)
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
+    def _loads(data: bytes):
+        return json.loads(data.decode('utf-8'))
+
+
+def _ends_json_object(buf) -> bool:
+    """Cheap check that the buffer could end a complete JSON object, so the
+    receive loop only attempts a full parse when one may actually succeed."""
+    for i in range(len(buf) - 1, -1, -1):
+        c = buf[i]
+        if c in (9, 10, 13, 32):  # JSON whitespace
+            continue
+        return c == 125  # '}'
+    return False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -25,6 +53,11 @@ class AbletonConnection:
             
         try:
             self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            # Commands are small JSON payloads on a persistent connection:
+            # disable Nagle so they go out immediately instead of waiting to
+            # be coalesced, and keep the idle connection alive
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
             self.sock.connect((self.host, self.port))
             logger.info(f"Connected to Ableton at {self.host}:{self.port}")
             return True
@@ -45,27 +78,35 @@ class AbletonConnection:
 
     def receive_full_response(self, sock, buffer_size=8192):
         """Receive the complete response, potentially in multiple chunks"""
-        chunks = []
+        buf = bytearray()
         sock.settimeout(15.0)  # Increased timeout for operations that might take longer
-        
+
         try:
             while True:
                 try:
                     chunk = sock.recv(buffer_size)
                     if not chunk:
-                        if not chunks:
-                            raise Exception("Connection closed before receiving any data")
+                        if not buf:
+                            # EOF: raise as ConnectionError so send_command
+                            # drops the socket and reconnects
+                            raise ConnectionError("Connection closed before receiving any data")
                         break
-                    
-                    chunks.append(chunk)
-                    
+
+                    buf.extend(chunk)
+
+                    # Re-parsing the whole buffer after every chunk is
+                    # quadratic in the response size; skip the attempt while
+                    # the buffer cannot even end a JSON object
+                    if not _ends_json_object(buf):
+                        continue
+
                     # Check if we've received a complete JSON object
                     try:
-                        data = b''.join(chunks)
-                        json.loads(data.decode('utf-8'))
+                        data = bytes(buf)
+                        _loads(data)
                         logger.info(f"Received complete response ({len(data)} bytes)")
                         return data
-                    except json.JSONDecodeError:
+                    except ValueError:
                         # Incomplete JSON, continue receiving
                         continue
                 except socket.timeout:
@@ -79,16 +120,22 @@ class AbletonConnection:
             raise
             
         # If we get here, we either timed out or broke out of the loop
-        if chunks:
-            data = b''.join(chunks)
+        if buf:
+            data = bytes(buf)
             logger.info(f"Returning data after receive completion ({len(data)} bytes)")
             try:
-                json.loads(data.decode('utf-8'))
+                _loads(data)
                 return data
-            except json.JSONDecodeError:
-                raise Exception("Incomplete JSON response received")
+            except ValueError:
+                # Raise as ValueError so send_command drops the socket: the
+                # unread tail of this response would desynchronize the stream
+                raise ValueError("Incomplete JSON response received")
         else:
-            raise Exception("No data received")
+            # Timed out with nothing read: a late reply may still land in the
+            # socket buffer and would be misread as the next command's
+            # response, so surface this as the timeout it is - send_command
+            # nulls the socket for it
+            raise socket.timeout("No data received")
 
     def send_command(self, command_type: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
         """Send a command to Ableton and return the response"""
@@ -112,7 +159,7 @@ class AbletonConnection:
             logger.info(f"Sending command: {command_type} with params: {params}")
             
             # Send the command
-            self.sock.sendall(json.dumps(command).encode('utf-8'))
+            self.sock.sendall(_dumps(command))
             logger.info(f"Command sent, waiting for response...")
             
             # For state-modifying commands, add a small delay to give Ableton time to process
@@ -129,7 +176,7 @@ class AbletonConnection:
             logger.info(f"Received {len(response_data)} bytes of data")
             
             # Parse the response
-            response = json.loads(response_data.decode('utf-8'))
+            response = _loads(response_data)
             logger.info(f"Response parsed, status: {response.get('status', 'unknown')}")
             
             if response.get("status") == "error":
@@ -150,16 +197,12 @@ class AbletonConnection:
             logger.error(f"Socket connection error: {str(e)}")
             self.sock = None
             raise Exception(f"Connection to Ableton lost: {str(e)}")
-        except json.JSONDecodeError as e:
+        except ValueError as e:
             logger.error(f"Invalid JSON response from Ableton: {str(e)}")
             if 'response_data' in locals() and response_data:
                 logger.error(f"Raw response (first 200 bytes): {response_data[:200]}")
             self.sock = None
             raise Exception(f"Invalid response from Ableton: {str(e)}")
-        except Exception as e:
-            logger.error(f"Error communicating with Ableton: {str(e)}")
-            self.sock = None
-            raise Exception(f"Communication error with Ableton: {str(e)}")
 
 @asynccontextmanager
 async def server_lifespan(server: FastMCP) -> AsyncIterator[Dict[str, Any]]:
@@ -1,14 +1,81 @@
+import re
+
 import sounddevice as sd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import matplotlib.pyplot as plt
 from scipy import signal
+from scipy.fft import next_fast_len, rfft, rfftfreq, set_backend
 import wave as wave_module
 
+# soundfile (libsndfile) writes the float32 capture buffer directly; fall back
+# to the stdlib wave module when it isn't installed
+try:
+    import soundfile as sf
+except ImportError:
+    sf = None
+
+# pyFFTW (FFTW3) as the scipy FFT backend when available; with the interface
+# cache enabled, repeated same-size STFTs reuse FFTW plans instead of
+# re-planning, which beats the default pocketfft on larger captures
+try:
+    import pyfftw
+    pyfftw.interfaces.cache.enable()
+    pyfftw.interfaces.cache.set_keepalive_time(60)
+    _FFTW_BACKEND = pyfftw.interfaces.scipy_fft
+except ImportError:
+    _FFTW_BACKEND = None
+
+# Virtual audio devices that can carry Ableton's output back to us
+_VIRTUAL_DEVICE_RE = re.compile(r'blackhole|soundflower|virtual|loopback', re.I)
+
+# STFT segment length is fixed, so the Hann window and its power
+# normalization only need to be computed once, at import
+_NPERSEG = 2048
+_HANN = signal.windows.hann(_NPERSEG, sym=False).astype(np.float32)
+_HANN_NORM = float(np.sum(_HANN ** 2))
+
+# Optional Numba JIT for the post-FFT magnitude pass: one fused, parallel
+# loop over all frames instead of several NumPy temporaries
+try:
+    from numba import njit, prange
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _power_from_rfft(re, im, scale, out):
+        for i in prange(re.shape[0]):
+            for j in range(re.shape[1]):
+                out[i, j] = (re[i, j] * re[i, j] + im[i, j] * im[i, j]) * scale
+except ImportError:
+    def _power_from_rfft(re, im, scale, out):
+        np.multiply(re, re, out=out)
+        out += im * im
+        out *= scale
+
 class MacAudioCapture:
     def __init__(self, sample_rate=44100):
         self.sample_rate = sample_rate
         self.channels = 1  # Start with mono, we'll adjust based on device
-        
+
+        # Device enumeration round-trips into PortAudio on every call;
+        # query once here and reuse the cached list everywhere
+        self._devices = sd.query_devices()
+
+        # Peak level of the last capture, measured once right after recording,
+        # and the array it was measured on so a stale value is never reused
+        self._max_level = None
+        self._max_level_src = None
+
+        # Recording buffer, reused across captures and only reallocated when
+        # the duration or channel count changes
+        self._buf = None
+
+        # Cached figure and artists so repeated analyses update data in
+        # place instead of rebuilding axes and colorbars every call
+        self._fig = None
+        self._axes = None
+        self._wave_line = None
+        self._ims = [None, None]
+
         # Show available devices
         print("=== Available Audio Devices ===")
         self.list_devices()
@@ -17,10 +84,15 @@ class MacAudioCapture:
         # Try to find the best input device
         self.recommended_device = self.find_best_input_device()
     
+    def refresh_devices(self):
+        """Re-query PortAudio, e.g. after a device was plugged or removed"""
+        self._devices = sd.query_devices()
+        return self._devices
+
     def list_devices(self):
         """List all available audio devices with their capabilities"""
-        devices = sd.query_devices()
-        
+        devices = self._devices
+
         print("INPUT DEVICES (for capturing audio):")
         input_devices = []
         for i, device in enumerate(devices):
@@ -44,15 +116,13 @@ class MacAudioCapture:
     
     def find_best_input_device(self):
         """Find the best available input device"""
-        devices = sd.query_devices()
-        
+        devices = self._devices
+
         # Look for BlackHole or other virtual audio devices first
         for i, device in enumerate(devices):
-            if device['max_input_channels'] > 0:
-                name = device['name'].lower()
-                if any(keyword in name for keyword in ['blackhole', 'soundflower', 'virtual', 'loopback']):
-                    print(f"🎯 Found virtual audio device: {device['name']} (Device {i})")
-                    return i
+            if device['max_input_channels'] > 0 and _VIRTUAL_DEVICE_RE.search(device['name']):
+                print(f"🎯 Found virtual audio device: {device['name']} (Device {i})")
+                return i
         
         # Fall back to default input device
         default_input = sd.default.device[0]
@@ -65,26 +135,23 @@ class MacAudioCapture:
     def test_device(self, device_id):
         """Test if a device works and determine its optimal settings"""
         try:
-            device_info = sd.query_devices(device_id)
+            device_info = self._devices[device_id]
             max_channels = device_info['max_input_channels']
             
             print(f"Testing device {device_id}: {device_info['name']}")
             print(f"Max input channels: {max_channels}")
             
-            # Test with 1 channel first
-            test_duration = 0.1  # Very short test
-            
+            # Validate against PortAudio without opening a stream - no need
+            # to actually record a test clip just to probe the settings
             for channels in [1, min(2, max_channels)]:
                 try:
                     print(f"  Testing {channels} channel(s)...")
-                    test_data = sd.rec(
-                        int(test_duration * self.sample_rate),
-                        samplerate=self.sample_rate,
-                        channels=channels,
+                    sd.check_input_settings(
                         device=device_id,
-                        dtype=np.float32
+                        channels=channels,
+                        samplerate=self.sample_rate,
+                        dtype='float32'
                     )
-                    sd.wait()
                     print(f"  ✅ {channels} channel(s) work!")
                     return channels
                 except Exception as e:
@@ -119,7 +186,7 @@ class MacAudioCapture:
             return None
         
         self.channels = optimal_channels
-        device_info = sd.query_devices(device)
+        device_info = self._devices[device]
         
         print(f"\n🎵 Capturing from: {device_info['name']}")
         print(f"📊 Using {self.channels} channel(s) at {self.sample_rate}Hz")
@@ -134,23 +201,49 @@ class MacAudioCapture:
         
         try:
             print("🎙️ RECORDING...")
-            
-            # Record audio
-            audio_data = sd.rec(
-                int(duration * self.sample_rate),
-                samplerate=self.sample_rate,
-                channels=self.channels,
-                device=device,
-                dtype=np.float32
-            )
-            
-            # Wait for recording to complete
-            sd.wait()
-            
+
+            # Record via a callback stream writing 1024-sample blocks into a
+            # preallocated buffer - bounded working set and no giant sd.rec
+            # allocation inside the PortAudio callback path
+            n_frames = int(duration * self.sample_rate)
+            if self._buf is None or self._buf.shape != (n_frames, self.channels):
+                self._buf = np.empty((n_frames, self.channels), dtype=np.float32)
+            audio_data = self._buf
+            write_index = 0
+
+            def callback(indata, frames, time_info, status):
+                nonlocal write_index
+                if status:
+                    print(f"⚠️  Stream status: {status}")
+                n = min(frames, n_frames - write_index)
+                if n > 0:
+                    audio_data[write_index:write_index + n] = indata[:n]
+                    write_index += n
+
+            with sd.InputStream(samplerate=self.sample_rate,
+                                channels=self.channels,
+                                dtype='float32',
+                                blocksize=1024,
+                                device=device,
+                                callback=callback):
+                sd.sleep(int(duration * 1000))
+                # Give the stream a moment to deliver the last blocks
+                waited_ms = 0
+                while write_index < n_frames and waited_ms < 1000:
+                    sd.sleep(50)
+                    waited_ms += 50
+
+            if write_index < n_frames:
+                print(f"⚠️  Capture ended early: {write_index}/{n_frames} frames")
+                audio_data = audio_data[:write_index]
+
             print("✅ Recording complete!")
             
-            # Check if we actually captured something
-            if np.max(np.abs(audio_data)) < 0.001:
+            # Check if we actually captured something; remember the peak so
+            # the analysis stage doesn't re-scan the whole buffer for it
+            self._max_level = float(np.abs(audio_data).max()) if len(audio_data) else 0.0
+            self._max_level_src = audio_data
+            if self._max_level < 0.001:
                 print("⚠️  WARNING: Very low audio levels detected!")
                 print("   Make sure:")
                 print("   • Ableton is playing")
@@ -163,72 +256,158 @@ class MacAudioCapture:
             print(f"❌ Recording failed: {e}")
             return None
     
-    def create_spectrogram(self, audio_data, title="Audio Analysis"):
-        """Create spectrogram with automatic mono conversion"""
+    def create_spectrogram(self, audio_data, title="Audio Analysis", save_path=None):
+        """Create spectrogram with automatic mono conversion.
+
+        If save_path is given the figure is rasterized straight to that file
+        (Agg) instead of opening a blocking interactive window.
+        """
         if audio_data is None or len(audio_data) == 0:
             print("❌ No audio data to analyze")
             return None
         
         # Convert to mono if stereo
-        if len(audio_data.shape) > 1 and audio_data.shape[1] > 1:
-            audio_mono = np.mean(audio_data, axis=1)
+        if audio_data.ndim > 1 and audio_data.shape[1] > 1:
+            # Keep the downmix in float32 (np.mean upcasts to float64 by
+            # default) and write straight into the target buffer
+            audio_mono = np.empty(audio_data.shape[0], dtype=np.float32)
+            np.mean(audio_data, axis=1, dtype=np.float32, out=audio_mono)
             print("🔄 Converted stereo to mono")
         else:
-            audio_mono = audio_data.flatten()
+            audio_mono = audio_data.reshape(-1)  # view, no copy
         
-        # Check audio levels
-        max_level = np.max(np.abs(audio_mono))
+        # Check audio levels, reusing the peak measured at capture time when
+        # this is the last captured buffer (the max-abs reduction is
+        # memory-bound on long buffers); any other input is measured fresh
+        if self._max_level is not None and audio_data is self._max_level_src:
+            max_level = self._max_level
+        else:
+            max_level = float(np.abs(audio_mono).max())
         print(f"📊 Audio level: {max_level:.4f} (should be > 0.01 for good results)")
         
         if max_level < 0.001:
             print("⚠️  Audio level too low - check your routing!")
         
-        # Calculate spectrogram
-        frequencies, times, Sxx = signal.spectrogram(
-            audio_mono,
-            fs=self.sample_rate,
-            window='hann',
-            nperseg=2048,
-            noverlap=1536
-        )
-        
-        # Create visualization
-        fig, axes = plt.subplots(3, 1, figsize=(14, 10))
+        # Calculate spectrogram with a one-sided (rfft) STFT.
+        # The input is real, so the full complex FFT would just compute
+        # redundant conjugate bins - rfft halves the FFT work and memory.
+        nperseg = _NPERSEG
+        hop = nperseg - 1536
+        if len(audio_mono) < nperseg:
+            print("❌ Not enough audio to analyze (need at least 2048 samples)")
+            return None
+
+        n_fft = next_fast_len(nperseg, real=True)
+
+        # Frame with a zero-copy strided view; the astype() is the only copy
+        # made (and makes the frames writable for the in-place windowing).
+        frames = sliding_window_view(audio_mono, nperseg)[::hop].astype(np.float32)
+        n_frames = frames.shape[0]
+        frames *= _HANN
+
+        if _FFTW_BACKEND is not None:
+            with set_backend(_FFTW_BACKEND):
+                X = rfft(frames, n=n_fft, axis=1, workers=-1)
+        else:
+            X = rfft(frames, n=n_fft, axis=1, workers=-1)
+        power = np.empty(X.shape, dtype=np.float32)
+        _power_from_rfft(X.real, X.imag, 1.0 / (self.sample_rate * _HANN_NORM), power)
+        Sxx = power.T
+        frequencies = rfftfreq(n_fft, 1.0 / self.sample_rate)
+        times = (np.arange(n_frames) * hop + nperseg / 2) / self.sample_rate
         
+        # Create the visualization figure, or reuse the cached one - building
+        # fresh axes and colorbars per call leaks Figure objects and repays
+        # all the layout cost on every refresh
+        if self._fig is None or not plt.fignum_exists(self._fig.number):
+            self._fig, self._axes = plt.subplots(3, 1, figsize=(14, 10))
+            self._wave_line = None
+            self._ims = [None, None]
+        fig, axes = self._fig, self._axes
+
         # 1. Waveform
         time_axis = np.linspace(0, len(audio_mono)/self.sample_rate, len(audio_mono))
-        axes[0].plot(time_axis, audio_mono, color='blue', alpha=0.8)
+        if self._wave_line is None:
+            self._wave_line, = axes[0].plot(time_axis, audio_mono, color='blue', alpha=0.8)
+            axes[0].set_xlabel('Time (s)')
+            axes[0].set_ylabel('Amplitude')
+            axes[0].grid(True, alpha=0.3)
+        else:
+            self._wave_line.set_data(time_axis, audio_mono)
+            axes[0].relim()
+            axes[0].autoscale_view()
         axes[0].set_title(f'Waveform - Max Level: {max_level:.4f}')
-        axes[0].set_xlabel('Time (s)')
-        axes[0].set_ylabel('Amplitude')
-        axes[0].grid(True, alpha=0.3)
-        
+
         # 2. Musical range spectrogram (20Hz-4kHz)
-        Sxx_db = 10 * np.log10(Sxx + 1e-12)
-        musical_freq_idx = (frequencies >= 20) & (frequencies <= 4000)
-        
+        # Only bins up to 10 kHz are ever plotted, so slice first and convert
+        # just that band to dB - log10 over the discarded rows is wasted work
+        plot_freq_idx = frequencies <= 10000
+        plot_freqs = frequencies[plot_freq_idx]
+        Sxx_db = Sxx[plot_freq_idx]  # fancy indexing copies, safe to reuse in place
+        np.maximum(Sxx_db, 1e-12, out=Sxx_db)
+        np.log10(Sxx_db, out=Sxx_db)
+        Sxx_db *= 10
+        musical_freq_idx = (plot_freqs >= 20) & (plot_freqs <= 4000)
+
+        # Cap the rendered time resolution: more STFT columns than output
+        # pixels only adds draw time, so max-pool down to ~1200 columns.
+        # Pool into display-only copies; the returned times/Sxx stay full-res
+        disp_db, disp_times = Sxx_db, times
+        target_width = 1200
+        if disp_db.shape[1] > target_width:
+            bin_size = disp_db.shape[1] // target_width
+            n_used = bin_size * target_width
+            disp_db = disp_db[:, :n_used].reshape(
+                disp_db.shape[0], target_width, bin_size).max(axis=2)
+            disp_times = disp_times[:n_used:bin_size]
+
         if np.any(musical_freq_idx):
-            im1 = axes[1].pcolormesh(times, frequencies[musical_freq_idx], 
-                                   Sxx_db[musical_freq_idx], 
-                                   shading='gouraud', cmap='magma')
-            axes[1].set_ylabel('Frequency (Hz)')
-            axes[1].set_title('Musical Range (20Hz-4kHz)')
-            plt.colorbar(im1, ax=axes[1], label='Power (dB)')
-        
+            musical_freqs = plot_freqs[musical_freq_idx]
+            musical_db = disp_db[musical_freq_idx]
+            extent = (disp_times[0], disp_times[-1], musical_freqs[0], musical_freqs[-1])
+            if self._ims[0] is None:
+                # imshow renders the uniform STFT grid as one textured quad
+                # instead of one shaded quad per bin; bilinear keeps the
+                # smoothed look
+                self._ims[0] = axes[1].imshow(musical_db,
+                                              origin='lower', aspect='auto',
+                                              extent=extent,
+                                              interpolation='bilinear', cmap='magma')
+                axes[1].set_ylabel('Frequency (Hz)')
+                axes[1].set_title('Musical Range (20Hz-4kHz)')
+                fig.colorbar(self._ims[0], ax=axes[1], label='Power (dB)')
+            else:
+                self._ims[0].set_data(musical_db)
+                self._ims[0].set_extent(extent)
+                self._ims[0].set_clim(float(musical_db.min()), float(musical_db.max()))
+                axes[1].set_xlim(extent[0], extent[1])
+
         # 3. Full spectrum
-        full_freq_idx = frequencies <= 10000
-        im2 = axes[2].pcolormesh(times, frequencies[full_freq_idx], 
-                               Sxx_db[full_freq_idx], 
-                               shading='gouraud', cmap='viridis')
-        axes[2].set_ylabel('Frequency (Hz)')
-        axes[2].set_xlabel('Time (s)')
-        axes[2].set_title('Full Spectrum (0-10kHz)')
-        plt.colorbar(im2, ax=axes[2], label='Power (dB)')
-        
-        plt.suptitle(title, fontsize=16, fontweight='bold')
-        plt.tight_layout()
-        plt.show()
-        
+        extent = (disp_times[0], disp_times[-1], plot_freqs[0], plot_freqs[-1])
+        if self._ims[1] is None:
+            self._ims[1] = axes[2].imshow(disp_db,
+                                          origin='lower', aspect='auto',
+                                          extent=extent,
+                                          interpolation='bilinear', cmap='viridis')
+            axes[2].set_ylabel('Frequency (Hz)')
+            axes[2].set_xlabel('Time (s)')
+            axes[2].set_title('Full Spectrum (0-10kHz)')
+            fig.colorbar(self._ims[1], ax=axes[2], label='Power (dB)')
+        else:
+            self._ims[1].set_data(disp_db)
+            self._ims[1].set_extent(extent)
+            self._ims[1].set_clim(float(disp_db.min()), float(disp_db.max()))
+            axes[2].set_xlim(extent[0], extent[1])
+
+        fig.suptitle(title, fontsize=16, fontweight='bold')
+        fig.tight_layout()
+        if save_path:
+            fig.savefig(save_path, dpi=100)
+            print(f"💾 Saved plot: {save_path}")
+        else:
+            fig.canvas.draw_idle()
+            plt.show()
+
         return frequencies, times, Sxx
     
     def save_audio(self, audio_data, filename="ableton_capture.wav"):
@@ -237,15 +416,24 @@ class MacAudioCapture:
             return False
         
         try:
-            # Convert to int16
-            audio_int16 = (audio_data * 32767).astype(np.int16)
-            
-            with wave_module.open(filename, 'wb') as wav_file:
-                wav_file.setnchannels(self.channels)
-                wav_file.setsampwidth(2)
-                wav_file.setframerate(self.sample_rate)
-                wav_file.writeframes(audio_int16.tobytes())
-            
+            if sf is not None:
+                # libsndfile quantizes to PCM 16 in C, straight from the
+                # float32 buffer - no Python-side int16 copy needed
+                sf.write(filename, audio_data, self.sample_rate, subtype='PCM_16')
+            else:
+                # Convert to int16: scale once, then round and clamp in place
+                # on the same scratch buffer so full-range samples can't wrap
+                scratch = np.multiply(audio_data, 32767.0, dtype=np.float32)
+                np.rint(scratch, out=scratch)
+                np.clip(scratch, -32768, 32767, out=scratch)
+                audio_int16 = scratch.astype(np.int16, copy=False)
+
+                with wave_module.open(filename, 'wb') as wav_file:
+                    wav_file.setnchannels(self.channels)
+                    wav_file.setsampwidth(2)
+                    wav_file.setframerate(self.sample_rate)
+                    wav_file.writeframes(audio_int16.tobytes())
+
             print(f"💾 Saved: {filename}")
             return True
             
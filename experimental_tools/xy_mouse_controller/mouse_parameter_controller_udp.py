@@ -15,11 +15,22 @@ Controls:
 
 import socket
 import json
+import queue
 import time
 import threading
 import sys
 from pynput import mouse
 
+# orjson serializes straight to bytes (no .encode step) and parses without
+# decoding first - a real win at mouse-move rates; stdlib json is the fallback
+try:
+    import orjson
+    def _json_dumps(obj): return orjson.dumps(obj)
+    def _json_loads(data): return orjson.loads(data)
+except ImportError:
+    def _json_dumps(obj): return json.dumps(obj).encode('utf-8')
+    def _json_loads(data): return json.loads(data)
+
 # Try different screen resolution detection methods
 try:
     from screeninfo import get_monitors
@@ -85,30 +96,39 @@ def debug_log(message):
     if debug_mode:
         print(f"[DEBUG_CLIENT] {time.time():.3f}: {message}")
 
-def _is_json_complete(json_str):
-    try: json.loads(json_str); return True
-    except json.JSONDecodeError: return False
+def _is_json_complete(json_bytes):
+    try: _json_loads(json_bytes); return True
+    except ValueError: return False
+
+def _ends_json_object(buf):
+    # Cheap pre-check so we only attempt a full parse when the buffer could
+    # actually end a JSON object - reparsing per chunk is quadratic
+    for i in range(len(buf) - 1, -1, -1):
+        c = buf[i]
+        if c in (9, 10, 13, 32): continue  # JSON whitespace
+        return c == 125  # '}'
+    return False
 
 def receive_full_response_tcp(sock_obj, buffer_size=BUFFER_SIZE):
     if not sock_obj: return None
     try:
-        sock_obj.settimeout(SOCKET_TIMEOUT) 
+        sock_obj.settimeout(SOCKET_TIMEOUT)
         data = sock_obj.recv(buffer_size)
         if not data:
             debug_log("receive_full_response_tcp: No initial data, connection closed.")
             return None
-        response_str = data.decode('utf-8')
+        buf = bytearray(data)
         attempts = 0
-        while not _is_json_complete(response_str) and attempts < 10:
+        while not (_ends_json_object(buf) and _is_json_complete(bytes(buf))) and attempts < 10:
             try:
                 sock_obj.settimeout(0.5)
                 more_data = sock_obj.recv(buffer_size)
                 if not more_data: break
-                response_str += more_data.decode('utf-8')
+                buf.extend(more_data)
                 attempts += 1
             except socket.timeout: break
             except Exception as e: debug_log(f"receive_full_response_tcp: More data error: {e}"); break
-        return response_str
+        return bytes(buf)
     except socket.timeout: debug_log("receive_full_response_tcp: Timeout."); return None
     except ConnectionResetError:
         debug_log("receive_full_response_tcp: ConnectionResetError.")
@@ -118,42 +138,9 @@ def receive_full_response_tcp(sock_obj, buffer_size=BUFFER_SIZE):
     except Exception as e: debug_log(f"receive_full_response_tcp: Error: {e}"); return None
 
 def send_command_tcp(command_type, params=None):
-    global tcp_sock, connected_tcp
-    if not connected_tcp and not connect_tcp():
-        debug_log(f"send_command_tcp ({command_type}): TCP Not connected and connect failed.")
-        return False
-    if params is None: params = {}
-    try:
-        if tcp_sock is None:
-            if not connect_tcp(): return False
-        
-        tcp_sock.settimeout(SOCKET_TIMEOUT)
-        command = {"type": command_type, "params": params}
-        cmd_str = json.dumps(command)
-        debug_log(f"TCP_TX ({command_type}): {cmd_str}")
-        tcp_sock.sendall(cmd_str.encode('utf-8'))
-        
-        response_raw = receive_full_response_tcp(tcp_sock)
-        if not response_raw:
-            debug_log(f"TCP_RX ({command_type}): No response."); return False
-        
-        debug_log(f"TCP_RX ({command_type}): {response_raw[:100]}{'...' if len(response_raw) > 100 else ''}")
-        try:
-            response_json = json.loads(response_raw)
-            if response_json.get("error"):
-                debug_log(f"TCP Server error for {command_type}: {response_json['error']}")
-                return False
-            return response_json.get("status") == "success" or "result" in response_json
-        except json.JSONDecodeError:
-            debug_log(f"TCP Invalid JSON for {command_type}: {response_raw[:50]}..."); return False
-    except socket.timeout:
-        debug_log(f"TCP Socket timeout sending {command_type}."); connected_tcp = False; tcp_sock = None; return False
-    except (ConnectionRefusedError, ConnectionResetError, BrokenPipeError) as e:
-        debug_log(f"TCP Connection error sending {command_type}: {e}"); connected_tcp = False; tcp_sock = None; return False
-    except Exception as e:
-        debug_log(f"TCP Generic error sending {command_type}: {e}");
-        if not isinstance(e, socket.timeout): connected_tcp = False; tcp_sock = None
-        return False
+    """Fire a command and report success only; thin wrapper so there is a
+    single send/receive/parse implementation to maintain and optimize."""
+    return send_command_with_response_tcp(command_type, params, max_retries=0) is not None
 
 def send_command_with_response_tcp(command_type, params=None, max_retries=MAX_RETRIES):
     global tcp_sock, connected_tcp, last_successful_tcp_command_time
@@ -169,9 +156,9 @@ def send_command_with_response_tcp(command_type, params=None, max_retries=MAX_RE
                     else: return None
             
             command = {"type": command_type, "params": params or {}}
-            cmd_str = json.dumps(command)
-            debug_log(f"TCP_TX_REQ ({command_type}, attempt {retry+1}): {cmd_str}")
-            tcp_sock.sendall(cmd_str.encode('utf-8'))
+            payload = _json_dumps(command)
+            debug_log(f"TCP_TX_REQ ({command_type}, attempt {retry+1}): {payload}")
+            tcp_sock.sendall(payload)
             
             response_data_raw = receive_full_response_tcp(tcp_sock)
             if not response_data_raw:
@@ -182,20 +169,20 @@ def send_command_with_response_tcp(command_type, params=None, max_retries=MAX_RE
             
             debug_log(f"TCP_RX_RESP ({command_type}, {len(response_data_raw)}B): {response_data_raw[:100]}...")
             try:
-                response_json = json.loads(response_data_raw)
+                response_json = _json_loads(response_data_raw)
                 if response_json.get("error"):
                     debug_log(f"TCP Command {command_type} error in response: {response_json['error']}")
                     if retry < max_retries: time.sleep(0.5); continue
                     return None
                 
                 if "result" in response_json or response_json.get("status") == "success":
-                    last_successful_tcp_command_time = time.time()
+                    last_successful_tcp_command_time = time.perf_counter()
                     return response_json
                 
                 debug_log(f"TCP Command {command_type} unexpected response: {response_json}")
                 if retry < max_retries: time.sleep(0.5); continue
                 return None
-            except json.JSONDecodeError:
+            except ValueError:
                 debug_log(f"TCP Invalid JSON for {command_type}: {response_data_raw[:100]}...")
                 if retry < max_retries: time.sleep(0.5); continue
                 return None
@@ -228,6 +215,10 @@ def connect_tcp():
             try: tcp_sock.close()
             except: pass
         tcp_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # Small JSON commands on a reused connection: turn off Nagle so they
+        # aren't held back for coalescing, and keep the idle session alive
+        tcp_sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        tcp_sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
         tcp_sock.settimeout(SOCKET_TIMEOUT)
         debug_log(f"Attempting TCP connect to {HOST}:{TCP_PORT}")
         tcp_sock.connect((HOST, TCP_PORT))
@@ -239,12 +230,12 @@ def connect_tcp():
             track_count = session_data.get("track_count", len(session_data.get("tracks",[])))
             if CONSOLE_UPDATES_ENABLED: print(f"TCP Connected. {track_count} tracks.")
             debug_log(f"TCP Connection successful. Tracks: {track_count}")
-            last_successful_tcp_command_time = time.time()
+            last_successful_tcp_command_time = time.perf_counter()
             return True
         else:
             if CONSOLE_UPDATES_ENABLED: print("TCP Connected but failed session info. Will retry.")
             debug_log("TCP Connected, but session info failed/malformed.")
-            last_successful_tcp_command_time = time.time()
+            last_successful_tcp_command_time = time.perf_counter()
             return True
     except Exception as e:
         if CONSOLE_UPDATES_ENABLED: print(f"TCP Connection error: {e}")
@@ -253,9 +244,16 @@ def connect_tcp():
         return False
 
 def init_udp_socket():
-    global udp_sock
+    global udp_sock, _udp_sender_thread
     try:
         udp_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # Destination never changes, so connect once: the kernel caches the
+        # route and each packet goes out with send() instead of sendto()
+        udp_sock.connect((HOST, UDP_PORT))
+        udp_sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+        if _udp_sender_thread is None:
+            _udp_sender_thread = threading.Thread(target=_udp_sender_loop, daemon=True)
+            _udp_sender_thread.start()
         debug_log(f"UDP socket initialized for sending to {HOST}:{UDP_PORT}")
         return True
     except Exception as e:
@@ -397,7 +395,9 @@ def interactive_parameter_selection():
     print("\nLoading tracks...")
     tracks = get_tracks()
     if not tracks: print("No tracks found."); return False
-    print("\nAvailable tracks:"); [print(f"  {t.get('index', 'N/A')}: {t.get('name', 'Unknown')} ({t.get('device_count', 'N/A')} dev)") for t in tracks]
+    # One joined write per listing instead of a print per row
+    sys.stdout.write("\nAvailable tracks:\n" + "\n".join(
+        f"  {t.get('index', 'N/A')}: {t.get('name', 'Unknown')} ({t.get('device_count', 'N/A')} dev)" for t in tracks) + "\n")
     while True:
         try:
             ti = input(f"\nTrack (0-{len(tracks)-1 if tracks else 0}, q=quit): ")
@@ -411,7 +411,8 @@ def interactive_parameter_selection():
     print(f"\nSelected track: {tn}. Loading devices...")
     devices = get_devices(TRACK_INDEX)
     if not devices: print(f"No devices on track {tn}."); return False
-    print("\nAvailable devices:"); [print(f"  {d.get('index', 'N/A')}: {d.get('name', 'Unknown')}") for d in devices]
+    sys.stdout.write("\nAvailable devices:\n" + "\n".join(
+        f"  {d.get('index', 'N/A')}: {d.get('name', 'Unknown')}" for d in devices) + "\n")
     while True:
         try:
             di = input(f"\nDevice (0-{len(devices)-1 if devices else 0}, q=quit): ")
@@ -425,15 +426,16 @@ def interactive_parameter_selection():
     print(f"\nSelected device: {dn}. Loading parameters...")
     parameters = get_device_parameters(TRACK_INDEX, DEVICE_INDEX)
     if not parameters: print(f"No parameters on device {dn}."); return False
-    print("\nAvailable parameters:"); 
+    lines = ["\nAvailable parameters:"]
     for p in parameters:
         val_disp = "N/A"
         norm_v = p.get("normalized_value")
         act_v = p.get("value")
         if norm_v is not None and isinstance(norm_v, float): val_disp = f"{norm_v:.2f} (norm)"
         elif act_v is not None: val_disp = f"{act_v:.2f} (act)" if isinstance(act_v, float) else str(act_v)
-        print(f"  {p.get('index','N/A')}: {p.get('name','Param?')} (curr: {val_disp})")
-    
+        lines.append(f"  {p.get('index','N/A')}: {p.get('name','Param?')} (curr: {val_disp})")
+    sys.stdout.write("\n".join(lines) + "\n")
+
     while True:
         try:
             xi = input(f"\nX param index (q=quit): "); 
@@ -460,7 +462,7 @@ def interactive_parameter_selection():
 
 def tcp_connection_health_check():
     global connected_tcp, tcp_sock, last_successful_tcp_command_time, parameter_update_failure_count_tcp
-    current_time = time.time()
+    current_time = time.perf_counter()
     if parameter_update_failure_count_tcp > 3 or \
        (last_successful_tcp_command_time > 0 and current_time - last_successful_tcp_command_time > 10.0):
         debug_log("Performing TCP connection health check...")
@@ -477,23 +479,61 @@ def tcp_connection_health_check():
             return False
     return connected_tcp
 
+# Pre-encoded payload heads per (track, device): the command type and target
+# never change between sends, so only the parameter index/value tail is
+# formatted on the hot path - no dict construction, no JSON encoder
+_udp_payload_heads = {}
+
+# Sends happen on a dedicated thread so the pynput event thread never blocks
+# on the socket; the tiny bounded queue keeps real-time semantics - if the
+# sender falls behind, stale samples are dropped and the newest wins
+_udp_tx_queue = queue.Queue(maxsize=2)
+_udp_sender_thread = None
+
+def _udp_sender_loop():
+    while True:
+        payload = _udp_tx_queue.get()
+        if payload is None:  # Shutdown sentinel
+            break
+        try:
+            udp_sock.send(payload)
+        except Exception as e:
+            debug_log(f"UDP: Sender thread error: {e}")
+
+def _enqueue_udp_payload(payload):
+    try:
+        _udp_tx_queue.put_nowait(payload)
+    except queue.Full:
+        # Drop the oldest in-flight payload rather than blocking the caller
+        try: _udp_tx_queue.get_nowait()
+        except queue.Empty: pass
+        try: _udp_tx_queue.put_nowait(payload)
+        except queue.Full: pass
+
+def _get_udp_payload_heads(track_idx, device_idx):
+    key = (track_idx, device_idx)
+    heads = _udp_payload_heads.get(key)
+    if heads is None:
+        heads = (
+            b'{"type":"set_device_parameter","params":{"track_index":%d,'
+            b'"device_index":%d,"parameter_index":' % key,
+            b'{"type":"batch_set_device_parameters","params":{"track_index":%d,'
+            b'"device_index":%d,"parameter_indices":[' % key,
+        )
+        _udp_payload_heads[key] = heads
+    return heads
+
 def send_parameter_update_udp(track_idx, device_idx, param_idx, value):
     global udp_sock
     if not udp_sock:
         debug_log("UDP: Socket not initialized, cannot send parameter update.")
         return
-    message = {
-        "type": "set_device_parameter",
-        "params": {
-            "track_index": track_idx, "device_index": device_idx,
-            "parameter_index": param_idx, "value": value
-        }
-    }
     try:
-        payload = json.dumps(message).encode('utf-8')
+        head, _ = _get_udp_payload_heads(track_idx, device_idx)
+        payload = b'%s%d,"value":%.6f}}' % (head, param_idx, value)
         # DEBUGGING: Print exactly what's being sent via UDP
         debug_log(f"UDP_TX_SINGLE to {HOST}:{UDP_PORT} -> {payload.decode()}")
-        udp_sock.sendto(payload, (HOST, UDP_PORT))
+        _enqueue_udp_payload(payload)
     except Exception as e:
         debug_log(f"UDP: Error sending parameter update: {e}")
 
@@ -502,21 +542,67 @@ def send_batch_parameter_update_udp(track_idx, device_idx, param_indices, values
     if not udp_sock:
         debug_log("UDP: Socket not initialized, cannot send batch parameter update.")
         return
-    message = {
-        "type": "batch_set_device_parameters",
-        "params": {
-            "track_index": track_idx, "device_index": device_idx,
-            "parameter_indices": param_indices, "values": values
-        }
-    }
     try:
-        payload = json.dumps(message).encode('utf-8')
+        _, head = _get_udp_payload_heads(track_idx, device_idx)
+        payload = b'%s%s],"values":[%s]}}' % (
+            head,
+            b','.join(b'%d' % i for i in param_indices),
+            b','.join(b'%.6f' % v for v in values))
         # DEBUGGING: Print exactly what's being sent via UDP
         debug_log(f"UDP_TX_BATCH to {HOST}:{UDP_PORT} -> {payload.decode()}")
-        udp_sock.sendto(payload, (HOST, UDP_PORT))
+        _enqueue_udp_payload(payload)
     except Exception as e:
         debug_log(f"UDP: Error sending batch parameter update: {e}")
 
+class _ParamCoalescer:
+    """Buffers individual parameter writes briefly and flushes them as one batch.
+
+    Rapid successive writes within the window collapse to a single
+    batch_set_device_parameters datagram, latest value per parameter wins.
+    """
+    def __init__(self, delay=0.005):
+        self._delay = delay
+        self._pending = {}
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def add(self, param_idx, value):
+        with self._lock:
+            self._pending[param_idx] = value
+            if self._timer is None:
+                self._timer = threading.Timer(self._delay, self.flush_now)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush_now(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+        send_batch_parameter_update_udp(TRACK_INDEX, DEVICE_INDEX,
+                                        list(pending.keys()), list(pending.values()))
+
+param_coalescer = _ParamCoalescer()
+
+# Cache for the console status line: the mapping changes rarely, so resolve
+# the parameter names once per mapping instead of scanning the parameter
+# list on every mouse update
+_console_name_cache = {"key": None, "x": "X_P", "y": "Y_P"}
+
+def _console_param_names():
+    key = (TRACK_INDEX, DEVICE_INDEX, X_PARAM_INDEX, Y_PARAM_INDEX)
+    if _console_name_cache["key"] != key:
+        xn, yn = "X_P", "Y_P"
+        dk = f"{TRACK_INDEX}:{DEVICE_INDEX}"
+        for p in device_parameters.get(dk) or []:
+            if p.get("index") == X_PARAM_INDEX: xn = p.get("name", "P")[:10]
+            if p.get("index") == Y_PARAM_INDEX: yn = p.get("name", "P")[:10]
+        _console_name_cache.update(key=key, x=xn, y=yn)
+    return _console_name_cache["x"], _console_name_cache["y"]
+
 def update_parameters_via_udp(x, y):
     global last_x_value, last_y_value
     norm_x = max(0.0, min(1.0, x / screen_width))
@@ -531,20 +617,16 @@ def update_parameters_via_udp(x, y):
         if y_changed: indices.append(Y_PARAM_INDEX); values.append(norm_y)
         if indices: send_batch_parameter_update_udp(TRACK_INDEX, DEVICE_INDEX, indices, values)
     elif PARAM_UPDATE_STRATEGY == "individual":
-        if x_changed: send_parameter_update_udp(TRACK_INDEX, DEVICE_INDEX, X_PARAM_INDEX, norm_x)
-        if y_changed: send_parameter_update_udp(TRACK_INDEX, DEVICE_INDEX, Y_PARAM_INDEX, norm_y)
+        # Coalesced: writes landing within the window go out as one batch
+        if x_changed: param_coalescer.add(X_PARAM_INDEX, norm_x)
+        if y_changed: param_coalescer.add(Y_PARAM_INDEX, norm_y)
 
     if x_changed: last_x_value = norm_x
     if y_changed: last_y_value = norm_y
 
     if CONSOLE_UPDATES_ENABLED:
-        x_param_name = "X_P"; y_param_name = "Y_P"
-        dk = f"{TRACK_INDEX}:{DEVICE_INDEX}"
-        if dk in device_parameters and device_parameters[dk]:
-            for p in device_parameters[dk]:
-                if p.get("index") == X_PARAM_INDEX: x_param_name = p.get("name","P")[:10]
-                if p.get("index") == Y_PARAM_INDEX: y_param_name = p.get("name","P")[:10]
-        
+        x_param_name, y_param_name = _console_param_names()
+
         sx = f"X:{norm_x:.2f}->{x_param_name}({X_PARAM_INDEX})" if x_changed else f"X:{last_x_value:.2f}"
         sy = f"Y:{norm_y:.2f}->{y_param_name}({Y_PARAM_INDEX})" if y_changed else f"Y:{last_y_value:.2f}"
         sl = f"T{TRACK_INDEX},D{DEVICE_INDEX}| {sx}, {sy} (UDP)"
@@ -553,7 +635,7 @@ def update_parameters_via_udp(x, y):
 def on_move(x, y):
     global last_param_update_time
     if running:
-        ct = time.time()
+        ct = time.perf_counter()
         if (ct - last_param_update_time) >= MIN_PARAM_UPDATE_INTERVAL:
             update_parameters_via_udp(x, y)
             last_param_update_time = ct
@@ -673,6 +755,12 @@ def main():
     finally:
         running = False
         if 'listener' in locals() and listener.is_alive(): listener.stop()
+        param_coalescer.flush_now()  # Don't drop updates still in the window
+        try: _udp_tx_queue.put(None, timeout=0.5)  # Stop the sender thread
+        except queue.Full: pass
+        # Wait for the sender to drain the final batch before closing the socket
+        if _udp_sender_thread is not None and _udp_sender_thread.is_alive():
+            _udp_sender_thread.join(timeout=1.0)
         if tcp_sock: debug_log("Closing TCP socket."); tcp_sock.close()
         if udp_sock: debug_log("Closing UDP socket."); udp_sock.close()
         print("Exited.")